@@ -1,6 +1,326 @@
 # train_monkey_detector.py
 from ultralytics import YOLO
+import matplotlib
+matplotlib.use('Agg')  # headless: no Qt/Tk init, no blocking show() on clusters
 import matplotlib.pyplot as plt
+import copy
+import functools
+import multiprocessing
+import queue
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import os
+import pandas as pd
+import torch
+
+# Tensor Cores: allow TF32 matmuls and let cudnn pick the fastest conv
+# algorithms for our fixed 640x640 shapes.
+torch.backends.cudnn.benchmark = True
+torch.set_float32_matmul_precision('high')
+
+import cv2
+
+try:
+    import albumentations as A
+    ALBUMENTATIONS_AVAILABLE = True
+except ImportError:
+    ALBUMENTATIONS_AVAILABLE = False
+
+try:
+    from nvidia.dali import fn, types, pipeline_def
+    from nvidia.dali.plugin.pytorch import DALIGenericIterator
+    DALI_AVAILABLE = True
+except ImportError:
+    DALI_AVAILABLE = False
+
+if DALI_AVAILABLE:
+    @pipeline_def
+    def _dali_train_pipeline(image_dir, imgsz=640):
+        """GPU data pipeline: nvJPEG decode + color/geometric augs on device.
+
+        Keeps JPEG decode and the HSV/rotate/flip augmentations off the CPU
+        DataLoader workers, which otherwise starve the GPU on long runs.
+        """
+        images, labels = fn.readers.file(file_root=image_dir, random_shuffle=True,
+                                         name='Reader')
+        images = fn.decoders.image(images, device='mixed', output_type=types.RGB)
+        images = fn.resize(images, size=[imgsz, imgsz])
+        images = fn.hsv(images, hue=fn.random.uniform(range=[-18.0, 18.0]),
+                        saturation=fn.random.uniform(range=[0.5, 1.5]),
+                        value=fn.random.uniform(range=[0.6, 1.4]))
+        images = fn.rotate(images, angle=fn.random.uniform(range=[-10.0, 10.0]),
+                           fill_value=114, keep_size=True)
+        images = fn.crop_mirror_normalize(images,
+                                          mirror=fn.random.coin_flip(probability=0.5),
+                                          dtype=types.FLOAT, std=[255.0] * 3)
+        return images, labels
+
+def get_dali_loader(image_dir, batch_size=16, imgsz=640, device_id=0):
+    """Build a DALI iterator for GPU-side decode + augmentation (if installed)"""
+    if not DALI_AVAILABLE:
+        raise RuntimeError("nvidia-dali not installed; using the default loader")
+
+    pipe = _dali_train_pipeline(image_dir, imgsz=imgsz, batch_size=batch_size,
+                                num_threads=4, device_id=device_id)
+    pipe.build()
+    return DALIGenericIterator(pipe, ['images', 'labels'], reader_name='Reader')
+
+def _training_devices():
+    """All visible CUDA devices (DDP) or 'cpu' when none are available"""
+    return list(range(torch.cuda.device_count())) or 'cpu'
+
+def preprocess_dataset(image_dir, imgsz=640, quality=90):
+    """One-shot resize + WebP re-encode of the training images.
+
+    The DataLoader otherwise decodes full-resolution JPEGs and resizes to 640
+    on every epoch; shrinking to longest-edge 640 WebP once makes per-epoch
+    decode cost proportional to the pixels actually used. Ultralytics picks
+    up .webp automatically; label .txt files are untouched (YOLO boxes are
+    normalized).
+    """
+    converted = 0
+    for root, _, files in os.walk(image_dir):
+        for name in files:
+            if not name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                continue
+            path = os.path.join(root, name)
+            im = cv2.imread(path)
+            if im is None:
+                continue
+            h, w = im.shape[:2]
+            scale = imgsz / max(h, w)
+            if scale < 1.0:
+                im = cv2.resize(im, (int(w * scale), int(h * scale)),
+                                interpolation=cv2.INTER_AREA)
+            # imwrite signals failure (full disk, missing WebP support)
+            # through its return value - only drop the original on success
+            if cv2.imwrite(os.path.splitext(path)[0] + '.webp', im,
+                           [cv2.IMWRITE_WEBP_QUALITY, quality]):
+                os.remove(path)
+                converted += 1
+
+    print(f"✅ Preprocessed {converted} images to {imgsz}px WebP in {image_dir}")
+    return converted
+
+def bake_augmentations(src_images, src_labels, dst_dir, multiplier=5):
+    """Pre-generate an augmented image pool once, instead of every epoch.
+
+    Heavy augmentation re-runs on CPU inside the DataLoader for every epoch of
+    a 100-200 epoch run. Baking a multiplier-sized pool to disk up front lets
+    training point at the baked set with mosaic/copy_paste disabled, keeping
+    only cheap online augs (flips, HSV jitter) in the per-iteration path.
+    """
+    if not ALBUMENTATIONS_AVAILABLE:
+        raise RuntimeError("albumentations (and cv2) required to bake augmentations")
+
+    os.makedirs(os.path.join(dst_dir, 'images'), exist_ok=True)
+    os.makedirs(os.path.join(dst_dir, 'labels'), exist_ok=True)
+
+    transform = A.Compose(
+        [A.Affine(rotate=(-10, 10), translate_percent=0.1, scale=(0.5, 1.5), p=0.9),
+         A.HueSaturationValue(p=0.7),
+         A.RandomBrightnessContrast(p=0.5)],
+        bbox_params=A.BboxParams(format='yolo', label_fields=['classes'],
+                                 min_visibility=0.3))
+
+    print(f"🧁 Baking {multiplier}x augmented pool into: {dst_dir}")
+    baked = 0
+    for img_path in sorted(src_images):
+        stem = os.path.splitext(os.path.basename(img_path))[0]
+        label_path = os.path.join(src_labels, stem + '.txt')
+        if not os.path.exists(label_path):
+            continue
+
+        image = cv2.imread(img_path)
+        rows = [line.split() for line in open(label_path)]
+        classes = [int(r[0]) for r in rows]
+        bboxes = [[float(v) for v in r[1:]] for r in rows]
+
+        for i in range(multiplier):
+            out = transform(image=image, bboxes=bboxes, classes=classes)
+            cv2.imwrite(os.path.join(dst_dir, 'images', f'{stem}_aug{i}.jpg'),
+                        out['image'])
+            with open(os.path.join(dst_dir, 'labels', f'{stem}_aug{i}.txt'), 'w') as f:
+                for cls, box in zip(out['classes'], out['bboxes']):
+                    f.write(f"{cls} {' '.join(f'{v:.6f}' for v in box)}\n")
+            baked += 1
+
+    print(f"✅ Baked {baked} images - train on them with mosaic=0.0, copy_paste=0.0")
+    return baked
+
+def best_map_by_epoch_budget(run_dir, budgets=(50, 100, 200)):
+    """Score several epoch budgets from one long run's results.csv.
+
+    Training to 50/100/200 epochs separately repeats work, since 50 epochs is
+    a strict prefix of 200. Train once with epochs=200 (save_period=50), then
+    read back the best mAP@0.5 reached within each budget from the CSV.
+    """
+    df = pd.read_csv(os.path.join(run_dir, 'results.csv'))
+    df.columns = df.columns.str.strip()  # Ultralytics pads column names
+
+    return {b: float(df['metrics/mAP50(B)'].head(b).max()) for b in budgets}
+
+class _FrameReader(threading.Thread):
+    """Capture webcam frames on a side thread so reads overlap inference.
+
+    A 2-slot queue keeps exactly one frame in flight: the next frame is
+    grabbed while the current one runs through the model, so throughput is
+    1/max(t_capture, t_infer) instead of 1/(t_capture + t_infer).
+    """
+
+    def __init__(self, camera_index=0):
+        super().__init__(daemon=True)
+        self.cap = cv2.VideoCapture(camera_index)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # no stale-frame latency pileup
+        self.frames = queue.Queue(maxsize=2)
+        self.running = True
+
+    def run(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.frames.put(frame, block=True)
+        self.frames.put(None)  # sentinel for iter(queue.get, None)
+
+    def stop(self):
+        self.running = False
+        self.cap.release()
+
+def _newest_mtime(root):
+    """Most recent modification time of anything under root"""
+    newest = os.path.getmtime(root)
+    for r, _, files in os.walk(root):
+        for f in files:
+            newest = max(newest, os.path.getmtime(os.path.join(r, f)))
+    return newest
+
+def _stage_dataset_to_ram(dataset_yaml, ramdisk='/dev/shm'):
+    """Copy the dataset onto a RAM disk so tune trials skip disk re-scans.
+
+    Every trial's train() re-validates images against labels, stat()ing each
+    file even when labels.cache exists; on network filesystems that costs
+    seconds per trial. Returns the original path unchanged when no RAM disk
+    is available.
+    """
+    if not os.path.isdir(ramdisk):
+        return dataset_yaml
+
+    src = os.path.dirname(os.path.abspath(dataset_yaml))
+    dst = os.path.join(ramdisk, 'monkey_tune_dataset')
+    # copytree preserves source mtimes, so staleness is tracked with an
+    # explicit stamp: a copy left over from a previous run is refreshed
+    # whenever anything in the source tree is newer than it
+    stamp = os.path.join(dst, '.staged')
+    if os.path.isdir(dst) and (not os.path.exists(stamp)
+                               or _newest_mtime(src) > os.path.getmtime(stamp)):
+        print(f"🗄️ RAM disk copy is stale, refreshing: {dst}")
+        shutil.rmtree(dst)
+    dst_yaml = os.path.join(dst, os.path.basename(dataset_yaml))
+    if not os.path.isdir(dst):
+        print(f"🗄️ Staging dataset to RAM disk: {dst}")
+        shutil.copytree(src, dst)
+        # Ultralytics resolves a relative path: key against its global
+        # DATASETS_DIR, not the yaml's own directory, so the copy must name
+        # the ramdisk absolutely or trials keep reading the original disk
+        with open(dst_yaml) as f:
+            lines = f.readlines()
+        with open(dst_yaml, 'w') as f:
+            rewritten = False
+            for line in lines:
+                if line.startswith('path:'):
+                    line = f'path: {dst}\n'
+                    rewritten = True
+                f.write(line)
+            if not rewritten:
+                f.write(f'path: {dst}\n')
+        with open(stamp, 'w'):
+            pass
+    return dst_yaml
+
+def _warm_cudnn_autotune(batch_sizes=(8, 16, 32), imgsz=640):
+    """Pre-pay cudnn.benchmark's algorithm search for the batch sizes tuned.
+
+    With benchmark mode on, the first iteration at each new (batch, shape)
+    triggers a 1-10 s heuristic search; running a dummy forward+backward per
+    batch size caches the chosen algorithms for every later trial in this
+    process.
+    """
+    if not torch.cuda.is_available():
+        return
+
+    print("🔥 Warming cudnn autotune...")
+    dummy = _fresh_yolo('yolov8n.pt')
+    dummy.model.cuda().train()
+    for b in batch_sizes:
+        x = torch.randn(b, 3, imgsz, imgsz, device='cuda')
+        y = dummy.model(x)
+        sum(t.sum() for t in y if isinstance(t, torch.Tensor)).backward()
+    torch.cuda.synchronize()
+
+def _run_tune_shard(device, dataset_path, iterations, epochs, space):
+    """Run one tuning shard pinned to a single GPU/MIG slice (subprocess)"""
+    os.environ['CUDA_VISIBLE_DEVICES'] = str(device)
+    model = YOLO('yolov8n.pt')
+    return model.tune(data=dataset_path, epochs=epochs, iterations=iterations,
+                      imgsz=640, cache='ram', space=space,
+                      name=f'tune_shard{device}', plots=False, save=False,
+                      val=True)
+
+# Target probabilities the warmup ramps towards, by transform class name
+_WARMUP_AUG_TARGETS = {'Mosaic': 1.0, 'MixUp': 0.1, 'CopyPaste': 0.1}
+
+def _augmentation_warmup(trainer, warmup_epochs=5):
+    """Ramp heavy CPU augs from 0 to their targets over the first epochs.
+
+    Early epochs are dominated by the pretrained init, so mosaic/mixup/
+    copy_paste buy no accuracy there while being the most expensive CPU-side
+    work per sample. Ultralytics already disables mosaic at the end
+    (close_mosaic); this gates the start symmetrically.
+
+    The transform pipeline is built from trainer.args once, when the
+    dataloader is constructed, so writing back to trainer.args here would
+    change nothing. Adjust the live transform objects on the train dataset
+    instead, the same way ultralytics' own _close_dataloader_mosaic does.
+    """
+    f = min(trainer.epoch / warmup_epochs, 1.0)
+    dataset = getattr(getattr(trainer, 'train_loader', None), 'dataset', None)
+    transforms = getattr(getattr(dataset, 'transforms', None), 'transforms', ())
+    for t in transforms:
+        target = _WARMUP_AUG_TARGETS.get(t.__class__.__name__)
+        if target is not None and hasattr(t, 'p'):
+            t.p = target * f
+
+def _compile_trainer_model(trainer):
+    """Compile the module the trainer actually steps (on_train_start).
+
+    This can't happen before train(): YOLO.train() builds a fresh
+    DetectionModel and loads the pretrained weights by intersecting
+    state-dict keys, and a pre-compiled OptimizedModule prefixes every key
+    with '_orig_mod.' - nothing transfers and training silently starts from
+    random init. Shapes are static for a run (imgsz/batch fixed), so
+    dynamic=False is safe.
+    """
+    if torch.cuda.is_available() and hasattr(torch, 'compile'):
+        trainer.model = torch.compile(trainer.model, mode='reduce-overhead',
+                                      dynamic=False)
+
+@functools.lru_cache(maxsize=4)
+def _load_yolo_template(weights_path):
+    """Parse a checkpoint into a YOLO object once per process"""
+    return YOLO(weights_path)
+
+def _fresh_yolo(weights_path='yolov8n.pt'):
+    """Independent YOLO instance without re-parsing the checkpoint.
+
+    YOLO() re-reads the .pt file and rebuilds the module graph from YAML
+    (~1-2 s) on every call; deep-copying a cached template skips that while
+    still giving each caller its own weights, so one training run can never
+    mutate another's starting point.
+    """
+    return copy.deepcopy(_load_yolo_template(weights_path))
 
 class MonkeyDetectorTrainer:
     def __init__(self):
@@ -16,10 +336,17 @@ class MonkeyDetectorTrainer:
         print(f"📦 Batch Size: {batch_size}")
         print()
 
-        # Load pre-trained YOLOv8 model
-        model = YOLO('yolov8n.pt')  # Nano version for faster training
+        # Load pre-trained YOLOv8 model (nano version for faster training)
+        model = _fresh_yolo('yolov8n.pt')
 
-        # Train the model
+        # yolov8n is launch-bound (many small conv kernels); compiling with
+        # CUDA-graph replay trims per-step Python/launch overhead
+        model.add_callback('on_train_start', _compile_trainer_model)
+
+        # Skip the heaviest CPU augmentations during the first few epochs
+        model.add_callback('on_train_epoch_start', _augmentation_warmup)
+
+        # Train the model (DDP across all visible GPUs, not single-GPU/DP)
         results = model.train(
             data=dataset_path,
             epochs=epochs,
@@ -27,25 +354,129 @@ class MonkeyDetectorTrainer:
             imgsz=640,
             name='monkey_detector_v1',
             save=True,
-            plots=True
+            plots=True,
+            device=_training_devices(),
+            nbs=64,  # keep nominal batch normalization correct after per-GPU split
+            workers=max(8, (os.cpu_count() or 8) // 2),
+            cache='ram',  # pinned-memory batches prefetched with non_blocking H2D copies
+            amp=True  # FP16 forward/backward on Tensor Cores
         )
 
         print("✅ Training completed!")
         return model, results
 
+    def tune_hyperparameters(self, dataset_path, iterations=30, epochs=30):
+        """Search lr0/batch/etc. with Ultralytics' evolutionary tuner.
+
+        A full Cartesian grid over lr0 x batch x epochs costs 27 complete
+        training runs; the built-in tuner early-stops weak configs instead,
+        so the same best mAP is reached in a fraction of the GPU time.
+        """
+
+        print("🔬 Tuning hyperparameters")
+        print(f"📁 Dataset: {dataset_path}")
+        print(f"🔁 Iterations: {iterations} (up to {epochs} epochs each)")
+        print()
+
+        dataset_path = _stage_dataset_to_ram(dataset_path)
+        _warm_cudnn_autotune()
+
+        space = {
+            'lr0': (1e-4, 1e-1),      # log-uniform, replaces [0.001, 0.01, 0.1]
+            'batch': (8, 32),
+            'momentum': (0.7, 0.98),
+            'weight_decay': (0.0, 0.001),
+        }
+
+        # yolov8n at batch=16 nowhere near saturates a big GPU; when several
+        # devices (or MIG slices) are visible, shard the iteration budget
+        # across one pinned subprocess per device.
+        n_devices = torch.cuda.device_count()
+        if n_devices > 1:
+            print(f"🖥️ Sharding trials across {n_devices} devices")
+            per_shard = -(-iterations // n_devices)  # ceil split
+            # _warm_cudnn_autotune already touched CUDA in this process, so
+            # forked children would die with "Cannot re-initialize CUDA in
+            # forked subprocess" — spawn fresh interpreters instead.
+            with ProcessPoolExecutor(
+                    max_workers=n_devices,
+                    mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = [pool.submit(_run_tune_shard, d, dataset_path,
+                                       per_shard, epochs, space)
+                           for d in range(n_devices)]
+                results = [f.result() for f in as_completed(futures)]
+        else:
+            model = _fresh_yolo('yolov8n.pt')
+            results = model.tune(
+                data=dataset_path,
+                epochs=epochs,
+                iterations=iterations,
+                imgsz=640,
+                cache='ram',  # build the label cache once, reuse for every trial
+                space=space,
+                plots=False,
+                save=False,
+                val=True,
+            )
+
+        print("✅ Tuning completed! Best settings written to runs/detect/tune*/")
+        return results
+
+    def plot_training_results(self, run_dir='runs/detect/monkey_detector_v1'):
+        """Plot loss and metric curves from a training run's results.csv"""
+
+        print(f"📈 Plotting training results from: {run_dir}")
+
+        # Only parse the columns we plot; pyarrow parses them multi-threaded
+        # instead of dtype-inferring every column through Python objects.
+        columns = ['epoch', 'train/box_loss', 'val/box_loss',
+                   'metrics/mAP50(B)', 'metrics/precision(B)', 'metrics/recall(B)']
+        df = pd.read_csv(os.path.join(run_dir, 'results.csv'),
+                         usecols=columns, engine='pyarrow',
+                         dtype_backend='pyarrow')
+        df.columns = df.columns.str.strip()
+
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+
+        ax1.plot(df['epoch'], df['train/box_loss'], label='train box loss')
+        ax1.plot(df['epoch'], df['val/box_loss'], label='val box loss')
+        ax1.set_xlabel('epoch')
+        ax1.set_title('Box Loss')
+        ax1.legend()
+
+        ax2.plot(df['epoch'], df['metrics/mAP50(B)'], label='mAP@0.5')
+        ax2.plot(df['epoch'], df['metrics/precision(B)'], label='precision')
+        ax2.plot(df['epoch'], df['metrics/recall(B)'], label='recall')
+        ax2.set_xlabel('epoch')
+        ax2.set_title('Validation Metrics')
+        ax2.legend()
+
+        fig.tight_layout()
+        out_path = os.path.join(run_dir, 'training_curves.png')
+        fig.savefig(out_path, dpi=120)
+        plt.close(fig)
+        print(f"💾 Saved: {out_path}")
+        return fig
+
     def evaluate_model(self, model, test_data):
         """Evaluate trained model performance"""
 
         print("🔍 Evaluating model performance...")
 
-        # Run validation
-        metrics = model.val()
+        # Run validation; skip the confusion-matrix PNGs and COCO JSON dump,
+        # which cost seconds of Matplotlib/serialization work per call.
+        metrics = model.val(plots=False, save_json=False, save_txt=False,
+                            verbose=False)
 
         print(f"📊 Results:")
         print(f"   mAP@0.5: {metrics.box.map50:.3f}")
         print(f"   mAP@0.5:0.95: {metrics.box.map:.3f}")
         print(f"   Precision: {metrics.box.mp:.3f}")
         print(f"   Recall: {metrics.box.mr:.3f}")
+        # Use the precomputed per-class F1 rather than 2*P*R/(P+R) in Python,
+        # which divides by zero when P+R is 0 early in training.
+        f1 = float(np.nan_to_num(metrics.box.f1).mean())
+        print(f"   F1-Score: {f1:.3f}")
 
         return metrics
 
@@ -62,16 +493,55 @@ class MonkeyDetectorTrainer:
             # Plot image with detections
             result.show()
 
-            # Print detections
+            # Print detections. One bulk device-to-host copy instead of a
+            # GPU sync per .item() call on every box.
             boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    conf = box.conf.item()
-                    cls = int(box.cls.item())
+            if boxes is not None and len(boxes):
+                confs = boxes.conf.cpu().numpy()
+                clss = boxes.cls.cpu().numpy().astype(int)
+                for conf, cls in zip(confs, clss):
                     print(f"   Detected: {model.names[cls]} (confidence: {conf:.3f})")
             else:
                 print("   No monkeys detected")
 
+    def test_real_world_detection(self, model, test_images, save_dir='real_world_results'):
+        """Run detection over a set of real-world test images"""
+
+        print(f"🌍 Testing on {len(test_images)} real-world images...")
+
+        os.makedirs(save_dir, exist_ok=True)
+
+        # One streamed call instead of model(img) per image: the frames share
+        # kernel-launch/NMS dispatch overhead and pipeline through the GPU.
+        results = model(test_images, stream=True,
+                        half=torch.cuda.is_available(), verbose=False)
+
+        detections = 0
+        for img_path, result in zip(test_images, results):
+            n = len(result.boxes) if result.boxes is not None else 0
+            detections += n
+            result.save(filename=os.path.join(save_dir, os.path.basename(img_path)))
+            print(f"   {os.path.basename(img_path)}: {n} monkey(s)")
+
+        print(f"✅ Done - {detections} detections saved to {save_dir}/")
+        return detections
+
+    def live_detection(self, model, camera_index=0):
+        """Run live webcam detection with capture prefetched off-thread"""
+
+        print("🎥 Starting live detection (Ctrl+C to stop)...")
+
+        reader = _FrameReader(camera_index)
+        reader.start()
+        try:
+            # Ultralytics' check_source rejects generators, so pull frames
+            # off the prefetch queue ourselves and run the model per frame;
+            # capture still overlaps inference through the reader thread.
+            for frame in iter(reader.frames.get, None):
+                model.predict(source=frame, show=True, verbose=False)
+        finally:
+            reader.stop()
+
 # Usage example
 if __name__ == "__main__":
     trainer = MonkeyDetectorTrainer()
@@ -4,21 +4,44 @@ AI-Powered Monkey Detection System - Fixed Detection Logic
 Prevents counting the same monkey multiple times
 """
 
+import contextlib
+import json
+import os
 import sys
+import zlib
 import cv2
 import numpy as np
+import queue
 import serial
+import serial.tools.list_ports
+import threading
 import time
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
-                           QWidget, QPushButton, QLabel, QTextEdit, QSlider,
+                           QWidget, QPushButton, QLabel, QPlainTextEdit, QSlider,
                            QGroupBox, QGridLayout, QComboBox, QSpinBox,
-                           QFileDialog, QMessageBox, QFrame)
+                           QCheckBox, QFileDialog, QMessageBox, QFrame)
 from PyQt5.QtCore import QThread, pyqtSignal, QTimer, Qt
 from PyQt5.QtGui import QPixmap, QImage, QFont
 
+# Qt 5.14+ accepts OpenCV's native BGR layout directly - no per-frame
+# BGR->RGB pass over the image
+_HAS_BGR888 = hasattr(QImage, 'Format_BGR888')
+
+# OpenCV T-API: route display resizes through OpenCL (integrated GPUs)
+# when available - typically 2-3x over the scalar CPU path
+_USE_OPENCL = cv2.ocl.haveOpenCL()
+
+# Stylesheet read once at import; applied app-wide so Qt parses it a single
+# time instead of per window
+try:
+    _STYLE = (Path(__file__).parent / "style.qss").read_text()
+except OSError:
+    _STYLE = ""
+
 try:
     from ultralytics import YOLO
     YOLO_AVAILABLE = True
@@ -26,6 +49,143 @@ except ImportError:
     YOLO_AVAILABLE = False
     print("Warning: ultralytics not installed. Install with: pip install ultralytics")
 
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+try:
+    import orjson  # ~10x faster (de)serialization than stdlib json
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import xxhash  # ~20 GB/s; dwarfs the cost of the pixmap pipeline it skips
+    _frame_hash = lambda data: xxhash.xxh64(data).intdigest()
+except ImportError:
+    _frame_hash = zlib.crc32
+
+if NUMBA_AVAILABLE:
+    # Tiny per-frame kernels: a JIT-compiled loop beats NumPy dispatch
+    # overhead on 64x64 buffers by a wide margin
+    @njit(cache=True, fastmath=True)
+    def _motion_score(prev, cur):
+        p = prev.ravel()
+        c = cur.ravel()
+        s = 0
+        for i in range(p.size):
+            d = int(c[i]) - int(p[i])
+            s += d if d >= 0 else -d
+        return s / p.size
+
+    @njit(cache=True)
+    def _filter_boxes(conf, thr):
+        keep = np.empty(conf.size, np.int64)
+        colors = np.empty(conf.size, np.int64)
+        n = 0
+        for i in range(conf.size):
+            if conf[i] > thr:
+                keep[n] = i
+                # 0=green (>0.8), 1=yellow (>0.6), 2=orange
+                colors[n] = 0 if conf[i] > 0.8 else (1 if conf[i] > 0.6 else 2)
+                n += 1
+        return keep[:n], colors[:n]
+
+else:
+    def _motion_score(prev, cur):
+        return cv2.absdiff(cur, prev).mean()
+
+    def _filter_boxes(conf, thr):
+        keep = np.nonzero(conf > thr)[0]
+        colors = np.where(conf[keep] > 0.8, 0,
+                          np.where(conf[keep] > 0.6, 1, 2))
+        return keep, colors
+
+# Index-matched to the color codes _filter_boxes returns
+_BOX_COLORS = ((0, 255, 0), (0, 255, 255), (0, 165, 255))
+
+class BufferPool:
+    """Bounded pool of reusable ndarrays keyed by shape/dtype.
+
+    Per-frame .copy() calls churn tens of MB/s through the allocator at
+    camera rate; recycling a handful of buffers keeps that memory warm
+    and off the GC's books.
+    """
+
+    def __init__(self, per_key=8):
+        self._per_key = per_key
+        self._free = {}
+        self._lock = threading.Lock()
+
+    def get(self, shape, dtype):
+        key = (shape, np.dtype(dtype).str)
+        with self._lock:
+            bufs = self._free.get(key)
+            if bufs:
+                return bufs.pop()
+        return np.empty(shape, dtype)
+
+    def put(self, arr):
+        key = (arr.shape, arr.dtype.str)
+        with self._lock:
+            bufs = self._free.setdefault(key, [])
+            if len(bufs) < self._per_key:
+                bufs.append(arr)
+
+class GpuPreprocessor:
+    """Letterbox + uint8→FP16 + HWC→NCHW done on the GPU.
+
+    The default preprocess resizes and converts each frame on the CPU; doing
+    it with torch ops on device moves only the raw uint8 frame over PCIe and
+    keeps the bandwidth-bound convert/transpose off the CPU.
+    """
+
+    def __init__(self, imgsz=640):
+        self.imgsz = imgsz
+        # Pinned staging buffers (allocated once, lazily to the frame shape)
+        # let the H2D copy run as a true async DMA on a private stream
+        # instead of a synchronous pageable transfer per frame. Two slots,
+        # alternated, so the next frame can be staged while the previous
+        # upload is still in flight.
+        self._pinned = None
+        self._pidx = 0
+        self._stream = torch.cuda.Stream()
+
+    def __call__(self, frame):
+        """Return (NCHW FP16 tensor on GPU, scale to map boxes back)"""
+        h, w = frame.shape[:2]
+        scale = min(self.imgsz / h, self.imgsz / w)
+        new_h, new_w = round(h * scale), round(w * scale)
+
+        if self._pinned is None or tuple(self._pinned[0].shape) != frame.shape:
+            self._pinned = [torch.empty(frame.shape, dtype=torch.uint8,
+                                        pin_memory=True) for _ in range(2)]
+        staging = self._pinned[self._pidx]
+        self._pidx ^= 1
+        staging.numpy()[:] = frame                                   # HWC uint8 BGR
+        with torch.cuda.stream(self._stream):
+            t = staging.cuda(non_blocking=True)
+            t = t.permute(2, 0, 1).flip(0).unsqueeze(0).half() / 255.0  # NCHW RGB
+            t = torch.nn.functional.interpolate(t, size=(new_h, new_w),
+                                                mode='bilinear',
+                                                align_corners=False)
+            # Pad right/bottom only, so boxes map back with a plain divide
+            t = torch.nn.functional.pad(
+                t, (0, self.imgsz - new_w, 0, self.imgsz - new_h),
+                value=114 / 255)
+        # Inference runs on the default stream; order it after the upload
+        # without blocking the CPU
+        torch.cuda.current_stream().wait_stream(self._stream)
+        return t, scale
+
 class FixedMonkeyDetectorGUI(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -39,8 +199,35 @@ class FixedMonkeyDetectorGUI(QMainWindow):
         self.detection_active = False
         self.arduino_connected = False
         self.confidence_threshold = 0.5
+        self.motion_threshold = 2.0
         self.detection_count = 0
 
+        # Reusable display buffer - avoids per-frame allocations in the
+        # 30 FPS GUI path (sized lazily to the displayed frame)
+        self._disp_buf = None
+        self._disp_key = None
+        self._disp_dims = None
+        self._last_frame_hash = None
+        # Label size is cached here and refreshed by resizeEvent, so the
+        # display path never crosses into Qt just to ask for it per frame
+        self._label_size = (640, 480)
+
+        # Pending log lines, flushed in one batch per status-timer tick
+        self._log_buf = deque()
+
+        # Detection snapshots: JPEG encode (10-30 ms) happens on a background
+        # writer thread, never on the GUI thread
+        self.auto_save = False
+        self.save_folder = "detections"
+        self._save_q = queue.Queue(maxsize=16)
+        self._frame_pool = BufferPool()  # recycles snapshot copies
+        threading.Thread(target=self._frame_writer, daemon=True).start()
+
+        # Persisted settings
+        self.camera_index = 0
+        self.settings = {}
+        self.load_settings()
+
         # IMPROVED Detection state tracking
         self.monkey_present = False
         self.detection_start_time = None
@@ -51,10 +238,11 @@ class FixedMonkeyDetectorGUI(QMainWindow):
         self.setup_ui()
         self.setup_styling()
 
-        # Status timer
-        self.status_timer = QTimer()
-        self.status_timer.timeout.connect(self.update_status)
-        self.status_timer.start(2000)
+        # Log flush timer - the only periodic wakeup left; status values are
+        # pushed event-driven from the worker threads
+        self.log_timer = QTimer()
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.start(2000)
 
         self.log_message("🚀 Monkey Detection System Initialized")
 
@@ -84,17 +272,17 @@ class FixedMonkeyDetectorGUI(QMainWindow):
     def create_header(self, parent_layout):
         """Create header"""
         header_frame = QFrame()
-        header_frame.setStyleSheet("background-color: #1e1e1e; border-radius: 8px; padding: 10px;")
+        header_frame.setObjectName("headerFrame")
         header_layout = QHBoxLayout(header_frame)
 
         title_label = QLabel("🐒 AI-Powered Monkey Detection System")
-        title_label.setStyleSheet("font-size: 20px; font-weight: bold; color: #4CAF50;")
+        title_label.setObjectName("titleLabel")
         header_layout.addWidget(title_label)
 
         header_layout.addStretch()
 
         self.system_status_label = QLabel("System Ready")
-        self.system_status_label.setStyleSheet("font-size: 12px; color: #888;")
+        self.system_status_label.setObjectName("statusLabel")
         header_layout.addWidget(self.system_status_label)
 
         parent_layout.addWidget(header_frame)
@@ -138,22 +326,47 @@ class FixedMonkeyDetectorGUI(QMainWindow):
 
         parent_layout.addLayout(left_panel, 2)
 
+    @staticmethod
+    def _mk_group(title, rows):
+        """Build a QGroupBox from rows of widgets (strings become QLabels).
+
+        One declarative grid per group replaces dozens of individual
+        addWidget/layout calls on cold start.
+        """
+        group = QGroupBox(title)
+        layout = QGridLayout(group)
+        for r, row in enumerate(rows):
+            if not isinstance(row, (list, tuple)):
+                row = (row,)
+            span = 1 if len(row) > 1 else 3
+            for c, widget in enumerate(row):
+                if isinstance(widget, str):
+                    widget = QLabel(widget)
+                layout.addWidget(widget, r, c, 1, span)
+        return group
+
     def create_controls_section(self, parent_layout):
         """Create controls"""
         right_panel = QVBoxLayout()
 
         # Model selection
-        model_group = QGroupBox("🧠 AI Model")
-        model_layout = QVBoxLayout(model_group)
-
         self.load_model_btn = QPushButton("📂 Load Trained Model")
         self.load_model_btn.clicked.connect(self.load_model)
-        model_layout.addWidget(self.load_model_btn)
+
+        self.export_engine_btn = QPushButton("⚡ Export TensorRT Engine")
+        self.export_engine_btn.clicked.connect(self.export_tensorrt)
+
+        self.export_int8_btn = QPushButton("⚡ Build INT8 Engine")
+        self.export_int8_btn.clicked.connect(self.export_int8)
 
         self.model_status_label = QLabel("❌ No model loaded")
-        model_layout.addWidget(self.model_status_label)
 
-        right_panel.addWidget(model_group)
+        right_panel.addWidget(self._mk_group("🧠 AI Model", [
+            self.load_model_btn,
+            self.export_engine_btn,
+            self.export_int8_btn,
+            self.model_status_label,
+        ]))
 
         # Arduino controls
         arduino_group = QGroupBox("🔌 Arduino Alert System")
@@ -161,18 +374,20 @@ class FixedMonkeyDetectorGUI(QMainWindow):
 
         arduino_layout.addWidget(QLabel("COM Port:"), 0, 0)
         self.com_port_combo = QComboBox()
-        self.com_port_combo.addItems(["COM1", "COM2", "COM3", "COM4", "COM5", "COM6", "COM7", "COM8"])
-        self.com_port_combo.setCurrentText("COM3")
+        self.refresh_com_ports()
         arduino_layout.addWidget(self.com_port_combo, 0, 1)
 
         arduino_buttons = QHBoxLayout()
         self.connect_arduino_btn = QPushButton("🔗 Connect")
+        self.rescan_ports_btn = QPushButton("🔄 Rescan")
         self.test_buzzer_btn = QPushButton("🔔 Test")
 
         self.connect_arduino_btn.clicked.connect(self.connect_arduino)
+        self.rescan_ports_btn.clicked.connect(self.refresh_com_ports)
         self.test_buzzer_btn.clicked.connect(self.test_buzzer)
 
         arduino_buttons.addWidget(self.connect_arduino_btn)
+        arduino_buttons.addWidget(self.rescan_ports_btn)
         arduino_buttons.addWidget(self.test_buzzer_btn)
         arduino_layout.addLayout(arduino_buttons, 1, 0, 1, 2)
 
@@ -182,42 +397,53 @@ class FixedMonkeyDetectorGUI(QMainWindow):
         right_panel.addWidget(arduino_group)
 
         # Detection settings
-        settings_group = QGroupBox("⚙️ Detection Settings")
-        settings_layout = QGridLayout(settings_group)
-
-        settings_layout.addWidget(QLabel("Confidence:"), 0, 0)
         self.confidence_slider = QSlider(Qt.Horizontal)
         self.confidence_slider.setRange(10, 95)
         self.confidence_slider.setValue(50)
         self.confidence_slider.valueChanged.connect(self.update_confidence)
-        settings_layout.addWidget(self.confidence_slider, 0, 1)
-
         self.confidence_label = QLabel("0.50")
-        settings_layout.addWidget(self.confidence_label, 0, 2)
 
-        right_panel.addWidget(settings_group)
+        self.motion_slider = QSlider(Qt.Horizontal)
+        self.motion_slider.setRange(0, 20)
+        self.motion_slider.setValue(2)
+        self.motion_slider.valueChanged.connect(self.update_motion_threshold)
+        self.motion_label = QLabel("2")
 
-        # System status
-        status_group = QGroupBox("📊 Detection Status")
-        status_layout = QVBoxLayout(status_group)
+        self.fp16_checkbox = QCheckBox("FP16 inference")
+        if TORCH_AVAILABLE and torch.cuda.is_available():
+            self.fp16_checkbox.setChecked(True)
+        else:
+            self.fp16_checkbox.setEnabled(False)  # no-op without CUDA
+
+        right_panel.addWidget(self._mk_group("⚙️ Detection Settings", [
+            ("Confidence:", self.confidence_slider, self.confidence_label),
+            ("Motion Gate:", self.motion_slider, self.motion_label),
+            self.fp16_checkbox,
+        ]))
 
+        # System status
         self.camera_status_label = QLabel("❌ Camera: Disconnected")
+        self.fps_label = QLabel("FPS: --")
         self.detection_count_label = QLabel("Unique Detections: 0")
         self.current_status_label = QLabel("Status: No Detection")
         self.last_detection_label = QLabel("Last Alert: Never")
 
-        status_layout.addWidget(self.camera_status_label)
-        status_layout.addWidget(self.detection_count_label)
-        status_layout.addWidget(self.current_status_label)
-        status_layout.addWidget(self.last_detection_label)
-
-        right_panel.addWidget(status_group)
+        right_panel.addWidget(self._mk_group("📊 Detection Status", [
+            self.camera_status_label,
+            self.fps_label,
+            self.detection_count_label,
+            self.current_status_label,
+            self.last_detection_label,
+        ]))
 
         # Activity log
         log_group = QGroupBox("📝 Activity Log")
         log_layout = QVBoxLayout(log_group)
 
-        self.log_text = QTextEdit()
+        # QPlainTextEdit + setMaximumBlockCount: Qt drops the oldest block
+        # in O(1) instead of our re-counting/removing head lines per flush
+        self.log_text = QPlainTextEdit()
+        self.log_text.setMaximumBlockCount(50)
         self.log_text.setMaximumHeight(120)
         self.log_text.setReadOnly(True)
         log_layout.addWidget(self.log_text)
@@ -233,117 +459,93 @@ class FixedMonkeyDetectorGUI(QMainWindow):
     def create_footer(self, parent_layout):
         """Create footer"""
         footer_frame = QFrame()
-        footer_frame.setStyleSheet("background-color: #1e1e1e; border-radius: 8px; padding: 8px;")
+        footer_frame.setObjectName("footerFrame")
         footer_layout = QHBoxLayout(footer_frame)
 
         status_label = QLabel("AI-Powered Detection System - Ready for Operation")
-        status_label.setStyleSheet("color: #888; font-size: 10px;")
+        status_label.setObjectName("footerLabel")
         footer_layout.addWidget(status_label)
 
         footer_layout.addStretch()
 
         version_label = QLabel("v3.0 - Fixed Detection Logic")
-        version_label.setStyleSheet("color: #888; font-size: 10px;")
+        version_label.setObjectName("footerLabel")
         footer_layout.addWidget(version_label)
 
         parent_layout.addWidget(footer_frame)
 
     def setup_styling(self):
-        """Apply styling"""
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #2b2b2b;
-                color: #ffffff;
-            }
-
-            QGroupBox {
-                font-weight: bold;
-                border: 2px solid #555;
-                border-radius: 8px;
-                margin-top: 1ex;
-                padding-top: 10px;
-            }
-
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 10px;
-                padding: 0 5px 0 5px;
-            }
-
-            QPushButton {
-                background-color: #4CAF50;
-                border: none;
-                color: white;
-                padding: 10px 15px;
-                border-radius: 6px;
-                font-weight: bold;
-                font-size: 12px;
-            }
-
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-
-            QPushButton:pressed {
-                background-color: #3d8b40;
-            }
-
-            QComboBox, QSpinBox {
-                padding: 8px;
-                border: 1px solid #555;
-                border-radius: 4px;
-                background-color: #3c3c3c;
-                color: #ffffff;
-                font-size: 11px;
-            }
-
-            QTextEdit {
-                background-color: #1e1e1e;
-                color: #ffffff;
-                border: 1px solid #555;
-                border-radius: 4px;
-                font-size: 11px;
-            }
-
-            QSlider::groove:horizontal {
-                border: 1px solid #999;
-                height: 6px;
-                background: #666;
-                border-radius: 3px;
-            }
-
-            QSlider::handle:horizontal {
-                background: #4CAF50;
-                border: 1px solid #4CAF50;
-                width: 16px;
-                margin: -5px 0;
-                border-radius: 8px;
-            }
-
-            QLabel {
-                font-size: 11px;
-            }
-        """)
+        """Apply styling (shared stylesheet loaded once at import)"""
+        self.setStyleSheet(_STYLE)
 
     # Core functionality
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if hasattr(self, 'camera_label'):
+            self._label_size = (self.camera_label.width(),
+                                self.camera_label.height())
+
     def update_confidence(self, value):
         """Update confidence threshold"""
         self.confidence_threshold = value / 100.0
         self.confidence_label.setText(f"{self.confidence_threshold:.2f}")
 
+    def update_motion_threshold(self, value):
+        """Update motion-gate threshold (0 disables the gate)"""
+        self.motion_threshold = float(value)
+        self.motion_label.setText(str(value))
+
+    @staticmethod
+    def _gst_pipeline(index):
+        """GStreamer capture pipeline: JPEG decode off the default path,
+        one-frame appsink so a slow consumer never builds a latency backlog"""
+        return (f"v4l2src device=/dev/video{index} ! "
+                "image/jpeg,width=1280,height=720 ! jpegdec ! videoconvert ! "
+                "appsink max-buffers=1 drop=true sync=false")
+
     def start_camera(self):
         """Start camera feed"""
         try:
-            self.camera = cv2.VideoCapture(0)
-            if not self.camera.isOpened():
-                self.show_error("Failed to open camera")
-                return
-
+            backend_name = None
+            # Prefer a GStreamer pipeline on Linux - decode happens in the
+            # pipeline (HW-assisted where available) and drop=true keeps
+            # only the freshest frame
+            if sys.platform != 'win32':
+                self.camera = cv2.VideoCapture(
+                    self._gst_pipeline(self.camera_index), cv2.CAP_GSTREAMER)
+                if self.camera.isOpened():
+                    backend_name = "GStreamer"
+
+            if backend_name is None:
+                # Explicit backend: default autodetect often negotiates raw
+                # YUYV with a 4-5 frame buffer, which doubles USB bandwidth
+                # and serves stale frames to detection
+                backend = (cv2.CAP_DSHOW if sys.platform == 'win32'
+                           else cv2.CAP_V4L2)
+                self.camera = cv2.VideoCapture(self.camera_index, backend)
+                if not self.camera.isOpened():
+                    self.show_error("Failed to open camera")
+                    return
+                backend_name = "DirectShow" if sys.platform == 'win32' else "V4L2"
+
+                self.camera.set(cv2.CAP_PROP_FOURCC,
+                                cv2.VideoWriter_fourcc(*'MJPG'))
+                self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # freshest frame only
+                self.camera.set(cv2.CAP_PROP_FPS, 30)
+
+                fourcc = int(self.camera.get(cv2.CAP_PROP_FOURCC))
+                fourcc_name = fourcc.to_bytes(4, 'little').decode(errors='replace')
+                self.log_message(f"Camera format negotiated: {fourcc_name}")
+            self.log_message(f"Capture backend: {backend_name}")
+
+            self._last_frame_hash = None
             self.camera_thread = CameraThread(self.camera)
             self.camera_thread.frame_ready.connect(self.update_camera_display)
+            self.camera_thread.fps_changed.connect(self.update_fps_label)
             self.camera_thread.start()
 
-            self.camera_status_label.setText("✅ Camera: Connected")
+            self.camera_status_label.setText(
+                f"✅ Camera: Connected ({backend_name})")
             self.log_message("Camera started successfully")
 
         except Exception as e:
@@ -355,7 +557,7 @@ class FixedMonkeyDetectorGUI(QMainWindow):
             self.show_error("Please load an AI model first!")
             return
 
-        if not self.camera or not self.camera.isOpened():
+        if not hasattr(self, 'camera_thread') or not self.camera_thread.running:
             self.show_error("Please start camera first!")
             return
 
@@ -365,10 +567,17 @@ class FixedMonkeyDetectorGUI(QMainWindow):
         self.detection_start_time = None
         self.no_detection_frames = 0
 
+        # Detection consumes frames from the camera thread's queue - the two
+        # threads never touch cv2.VideoCapture concurrently
         self.detection_thread = ProperDetectionThread(
-            self.camera, self.model, self.confidence_threshold, self
+            self.camera_thread.frames, self.model, self.confidence_threshold, self,
+            half=self.fp16_checkbox.isChecked()
         )
         self.detection_thread.detection_result.connect(self.handle_detection)
+        # Queued so the widget work happens on the GUI thread and the
+        # detection pipeline never waits on a pixmap update
+        self.detection_thread.display_frame.connect(
+            self.update_camera_display, Qt.QueuedConnection)
         self.detection_thread.start()
 
         self.log_message("🚀 AI detection started with improved logic")
@@ -379,6 +588,7 @@ class FixedMonkeyDetectorGUI(QMainWindow):
         self.detection_active = False
         self.monkey_present = False
         self.no_detection_frames = 0
+        self._last_frame_hash = None
 
         # Stop detection thread
         if hasattr(self, 'detection_thread'):
@@ -395,11 +605,7 @@ class FixedMonkeyDetectorGUI(QMainWindow):
             self.camera = None
 
         # Turn off Arduino buzzer
-        if self.arduino_connected and self.arduino:
-            try:
-                self.arduino.write(b'STOP_ALERT\n')
-            except:
-                pass
+        self._send_arduino(b'STOP_ALERT\n')
 
         self.camera_status_label.setText("❌ Camera: Disconnected")
         self.current_status_label.setText("Status: Stopped")
@@ -415,11 +621,42 @@ class FixedMonkeyDetectorGUI(QMainWindow):
             return
 
         try:
+            # Prefer previously exported TensorRT engines over the .pt —
+            # fused/auto-tuned kernels run 2-5x faster per frame. INT8 beats
+            # FP16 where it exists (the alert task tolerates the precision).
+            weights = Path("runs/detect/monkey_detector_v1/weights")
+            for engine, label in ((weights / "best_int8.engine", "INT8"),
+                                  (weights / "best.engine", "FP16")):
+                if engine.exists():
+                    self.model = YOLO(str(engine))
+                    self.model_status_label.setText(
+                        f"✅ TensorRT engine loaded ({label})")
+                    self.log_message(f"TensorRT {label} engine loaded")
+                    return
+
             # Try to load the trained model first
             trained_model_path = "runs/detect/monkey_detector_v1/weights/best.pt"
             if Path(trained_model_path).exists():
+                # One-time engine build on CUDA hosts: costs minutes once,
+                # then every subsequent launch picks up the engine above
+                if TORCH_AVAILABLE and torch.cuda.is_available():
+                    try:
+                        self.log_message("⚡ Building TensorRT engine "
+                                         "(one-time, a few minutes)...")
+                        built = YOLO(trained_model_path).export(
+                            format="engine", half=True,
+                            imgsz=ProperDetectionThread.IMGSZ, device=0)
+                        self.model = YOLO(built)
+                        self.model_status_label.setText("✅ TensorRT engine loaded")
+                        self.log_message(f"TensorRT engine ready: {built}")
+                        return
+                    except Exception as e:
+                        self.log_message(f"Engine build failed ({e}), "
+                                         "using PyTorch weights")
                 self.model = YOLO(trained_model_path)
-                self.model_status_label.setText("✅ Custom trained model loaded (88.4% mAP)")
+                self._compile_model()
+                self.model_status_label.setText(
+                    "✅ Custom trained model loaded (PyTorch, 88.4% mAP)")
                 self.log_message("Custom trained model loaded successfully")
                 return
 
@@ -430,38 +667,183 @@ class FixedMonkeyDetectorGUI(QMainWindow):
 
             if file_path:
                 self.model = YOLO(file_path)
+                self._compile_model()
                 self.model_status_label.setText("✅ AI Model: Loaded")
                 self.log_message(f"Model loaded: {Path(file_path).name}")
 
         except Exception as e:
             self.show_error(f"Failed to load model: {str(e)}")
 
+    def _compile_model(self):
+        """torch.compile the PyTorch model in place - the zero-export path.
+
+        Used when no TensorRT engine could be built; inductor fusion and
+        CUDA-graph capture recover a good share of the engine win. Warmup
+        pays the compile cost here instead of on the first live frame.
+        """
+        if not (TORCH_AVAILABLE and torch.cuda.is_available()
+                and hasattr(torch, 'compile')):
+            return
+        try:
+            self.model.model = torch.compile(
+                self.model.model, mode='max-autotune', dynamic=False)
+            sz = ProperDetectionThread.IMGSZ
+            self.model(np.zeros((sz, sz, 3), dtype=np.uint8),
+                       imgsz=sz, verbose=False)
+            self.log_message("Model compiled (max-autotune)")
+        except Exception:
+            pass  # older torch / unsupported backend: plain eager still works
+
+    def export_tensorrt(self):
+        """Export the loaded model to a TensorRT engine and switch to it"""
+        if not self.model:
+            self.show_error("Please load an AI model first!")
+            return
+
+        try:
+            self.log_message("⚡ Exporting TensorRT engine (this can take a few minutes)...")
+            # Same input size as the detection pipeline: the preprocessor
+            # hands the engine fixed IMGSZ tensors, and a 640 engine would
+            # fail its shape check on every frame
+            engine_path = self.model.export(format="engine", device=0,
+                                            half=True,
+                                            imgsz=ProperDetectionThread.IMGSZ)
+            self.model = YOLO(engine_path)
+            self.model_status_label.setText("✅ TensorRT engine loaded")
+            self.log_message(f"TensorRT engine ready: {engine_path}")
+        except Exception as e:
+            self.show_error(f"TensorRT export failed: {str(e)}")
+
+    def export_int8(self):
+        """Build an INT8-calibrated TensorRT engine and switch to it.
+
+        Needs the dataset yaml for calibration images; falls back with an
+        error (FP16 engine keeps working) where the GPU lacks INT8 paths.
+        """
+        pt_path = Path("runs/detect/monkey_detector_v1/weights/best.pt")
+        if not pt_path.exists():
+            self.show_error("Trained weights not found - train a model first!")
+            return
+
+        try:
+            self.log_message("⚡ Building INT8 engine (calibration takes a while)...")
+            built = YOLO(str(pt_path)).export(
+                format="engine", int8=True, data="monkey_dataset/data.yaml",
+                imgsz=ProperDetectionThread.IMGSZ, device=0)
+            int8_path = pt_path.with_name("best_int8.engine")
+            os.replace(built, int8_path)
+            self.model = YOLO(str(int8_path))
+            self.model_status_label.setText("✅ TensorRT engine loaded (INT8)")
+            self.log_message(f"INT8 engine ready: {int8_path}")
+        except Exception as e:
+            self.show_error(f"INT8 engine build failed: {str(e)}")
+
+    def refresh_com_ports(self):
+        """Populate the COM port list from the ports actually present"""
+        self.com_port_combo.clear()
+        self.com_port_combo.addItems(
+            [p.device for p in serial.tools.list_ports.comports()])
+
     def connect_arduino(self):
         """Connect to Arduino"""
         try:
             com_port = self.com_port_combo.currentText()
-            self.arduino = serial.Serial(com_port, 9600, timeout=2)
-            time.sleep(2)
+            if not com_port:
+                self.show_error("No serial ports found - is the Arduino plugged in?")
+                return
+            # 115200 baud cuts per-byte wire time ~12x vs 9600; the Arduino
+            # sketch must call Serial.begin(115200) to match
+            self.arduino = serial.serial_for_url(com_port, baudrate=115200,
+                                                 timeout=0.5)
 
-            # Test connection
-            self.arduino.write(b'STATUS\n')
-            time.sleep(0.5)
+            self.serial_worker = SerialWorker(self.arduino)
+            self.serial_worker.start()
 
-            self.arduino_connected = True
-            self.arduino_status_label.setText(f"✅ Arduino: Connected ({com_port})")
-            self.log_message(f"Arduino connected on {com_port}")
+            # The Arduino resets when the port opens; probe it after boot via
+            # a timer instead of blocking the GUI event loop for 2 seconds
+            self.arduino_status_label.setText(f"⏳ Arduino: Connecting ({com_port})...")
+            QTimer.singleShot(2000, self._finish_arduino_connect)
 
         except Exception as e:
             self.show_error(f"Arduino connection failed: {str(e)}")
 
-    def test_buzzer(self):
-        """Test Arduino buzzer"""
-        if self.arduino_connected and self.arduino:
+    def _finish_arduino_connect(self):
+        """Complete the Arduino handshake once the board has rebooted"""
+        com_port = self.com_port_combo.currentText()
+        self.serial_worker.send(b'STATUS\n')
+        self.arduino_connected = True
+        self.arduino_status_label.setText(f"✅ Arduino: Connected ({com_port})")
+        self.log_message(f"Arduino connected on {com_port}")
+
+    SETTINGS_FILE = "settings.json"
+
+    def load_settings(self):
+        """Load persisted settings from settings.json"""
+        try:
+            raw = open(self.SETTINGS_FILE, 'rb').read()
+            self.settings = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+        except (OSError, ValueError):
+            return
+        self.camera_index = self.settings.get('camera_index', self.camera_index)
+        self.auto_save = self.settings.get('auto_save', self.auto_save)
+        self.save_folder = self.settings.get('save_folder', self.save_folder)
+
+    def save_settings(self):
+        """Persist settings atomically (temp file + rename, no partial writes)"""
+        settings = dict(self.settings)
+        settings.update(camera_index=self.camera_index,
+                        auto_save=self.auto_save,
+                        save_folder=self.save_folder)
+        if ORJSON_AVAILABLE:
+            data = orjson.dumps(settings, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(settings, indent=2).encode()
+
+        tmp = self.SETTINGS_FILE + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self.SETTINGS_FILE)
+
+    def _frame_writer(self):
+        """Drain the save queue and write frames to disk (daemon thread)"""
+        while True:
+            path, frame = self._save_q.get()
             try:
-                self.arduino.write(b'TEST\n')
-                self.log_message("🔔 Buzzer test sent to Arduino")
+                cv2.imwrite(path, frame)
             except Exception as e:
-                self.show_error(f"Buzzer test failed: {str(e)}")
+                print(f"Frame save error: {e}")
+            finally:
+                self._frame_pool.put(frame)  # recycle the snapshot buffer
+
+    def save_detection_frame(self, frame):
+        """Queue a detection snapshot for asynchronous saving"""
+        Path(self.save_folder).mkdir(exist_ok=True)
+        filename = str(Path(self.save_folder) /
+                       f"detection_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg")
+        try:
+            # Copy into a pooled buffer: the capture buffer may be rewritten
+            # by the reader, and the pool spares a malloc per snapshot
+            buf = self._frame_pool.get(frame.shape, frame.dtype)
+            np.copyto(buf, frame)
+            self._save_q.put_nowait((filename, buf))
+        except queue.Full:
+            try:  # drop the oldest snapshot to stay live
+                _, old = self._save_q.get_nowait()
+                self._frame_pool.put(old)
+                self._save_q.put_nowait((filename, buf))
+            except queue.Empty:
+                pass
+
+    def _send_arduino(self, command):
+        """Queue a command for the Arduino without blocking (if connected)"""
+        if self.arduino_connected and hasattr(self, 'serial_worker'):
+            self.serial_worker.send(command)
+
+    def test_buzzer(self):
+        """Test Arduino buzzer"""
+        if self.arduino_connected:
+            self._send_arduino(b'TEST\n')
+            self.log_message("🔔 Buzzer test sent to Arduino")
         else:
             self.show_error("Arduino not connected")
 
@@ -484,11 +866,11 @@ class FixedMonkeyDetectorGUI(QMainWindow):
                 self.last_detection_label.setText(f"Last Alert: {datetime.now().strftime('%H:%M:%S')}")
 
                 # Arduino alert for NEW detection only
-                if self.arduino_connected and self.arduino:
-                    try:
-                        self.arduino.write(b'MONKEY_DETECTED\n')
-                    except:
-                        pass
+                self._send_arduino(b'MONKEY_DETECTED\n')
+
+                # Snapshot of the annotated frame (async, non-blocking)
+                if self.auto_save:
+                    self.save_detection_frame(frame)
 
                 # Log NEW detection
                 self.log_message(f"🐒 NEW MONKEY DETECTED! Count: {self.detection_count}, Confidence: {confidence:.2f}")
@@ -506,11 +888,7 @@ class FixedMonkeyDetectorGUI(QMainWindow):
                 self.current_status_label.setText("Status: Monitoring...")
 
                 # Turn off Arduino buzzer
-                if self.arduino_connected and self.arduino:
-                    try:
-                        self.arduino.write(b'STOP_ALERT\n')
-                    except:
-                        pass
+                self._send_arduino(b'STOP_ALERT\n')
 
                 self.log_message("Monkey left area - Ready for new detection")
             elif not self.monkey_present:
@@ -519,33 +897,68 @@ class FixedMonkeyDetectorGUI(QMainWindow):
 
     def update_camera_display(self, frame):
         """Update camera display"""
-        rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_image.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-
-        pixmap = QPixmap.fromImage(qt_image)
-        scaled_pixmap = pixmap.scaled(
-            self.camera_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-        )
-        self.camera_label.setPixmap(scaled_pixmap)
+        # When no detection overlay is being drawn, skip the whole pixmap
+        # pipeline for frames identical to the one already shown (paused
+        # camera, static scene)
+        if not self.detection_active:
+            small = cv2.cvtColor(cv2.resize(frame, (32, 32)), cv2.COLOR_BGR2GRAY)
+            frame_hash = _frame_hash(small.tobytes())
+            if frame_hash == self._last_frame_hash:
+                return
+            self._last_frame_hash = frame_hash
+
+        # Downscale to the label size BEFORE color conversion so the RGB
+        # expansion touches display-sized pixels, and reuse one buffer
+        # instead of allocating rgb_image/QImage/QPixmap copies per frame.
+        h, w = frame.shape[:2]
+        # Target dims change only when the frame shape or the label size
+        # does; recompute (and reallocate) on that key, not per frame
+        key = (h, w, self._label_size)
+        if key != self._disp_key:
+            label_w, label_h = self._label_size
+            scale = min(label_w / w, label_h / h)
+            self._disp_dims = (max(1, int(w * scale)), max(1, int(h * scale)))
+            self._disp_buf = np.empty(
+                (self._disp_dims[1], self._disp_dims[0], 3), np.uint8)
+            self._disp_key = key
+        disp_w, disp_h = self._disp_dims
+
+        if _USE_OPENCL:
+            # UMat runs the resize on the OpenCL device; .get() costs one
+            # device-to-host copy of the (small) display-sized image
+            self._disp_buf = cv2.resize(cv2.UMat(frame), (disp_w, disp_h),
+                                        interpolation=cv2.INTER_AREA).get()
+        else:
+            cv2.resize(frame, (disp_w, disp_h), dst=self._disp_buf,
+                       interpolation=cv2.INTER_AREA)
+
+        if _HAS_BGR888:
+            qt_image = QImage(self._disp_buf.data, disp_w, disp_h, 3 * disp_w,
+                              QImage.Format_BGR888)
+        else:
+            cv2.cvtColor(self._disp_buf, cv2.COLOR_BGR2RGB, dst=self._disp_buf)
+            qt_image = QImage(self._disp_buf.data, disp_w, disp_h, 3 * disp_w,
+                              QImage.Format_RGB888)
+        self.camera_label.setPixmap(QPixmap.fromImage(qt_image))
 
-    def update_status(self):
-        """Update system status"""
-        pass
+    def update_fps_label(self, fps):
+        """Refresh the FPS readout (signal-driven, no polling)"""
+        self.fps_label.setText(f"FPS: {fps:.1f}")
 
     def log_message(self, message):
-        """Add message to log"""
+        """Buffer a log message (flushed in batches by the status timer)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}"
-        self.log_text.append(formatted_message)
+        # Appending to the log widget re-lays-out the document; from detection hot
+        # paths that adds up, so buffer and flush once per timer tick
+        self._log_buf.append(f"[{timestamp}] {message}")
 
-        # Keep log manageable
-        if self.log_text.document().lineCount() > 50:
-            cursor = self.log_text.textCursor()
-            cursor.movePosition(cursor.Start)
-            cursor.select(cursor.LineUnderCursor)
-            cursor.removeSelectedText()
+    def flush_log(self):
+        """Flush buffered log messages in one append"""
+        if not self._log_buf:
+            return
+        # setMaximumBlockCount keeps the widget at 50 lines automatically
+        self.log_text.appendPlainText('\n'.join(self._log_buf))
+        self._log_buf.clear()
 
     def clear_log(self):
         """Clear log"""
@@ -559,6 +972,10 @@ class FixedMonkeyDetectorGUI(QMainWindow):
     def closeEvent(self, event):
         """Clean shutdown"""
         self.stop_all()
+        self.save_settings()
+        if hasattr(self, 'serial_worker'):
+            self.serial_worker.stop()
+            self.serial_worker.wait()
         if self.arduino:
             self.arduino.close()
         event.accept()
@@ -566,81 +983,392 @@ class FixedMonkeyDetectorGUI(QMainWindow):
 # PROPER detection thread with improved logic
 class ProperDetectionThread(QThread):
     detection_result = pyqtSignal(bool, float, np.ndarray)
+    # object signature for the same reason as CameraThread.frame_ready:
+    # the ndarray crosses threads by reference, not through QVariant
+    display_frame = pyqtSignal(object)
+
+    # The alert use-case only needs "is there a monkey", not tight boxes;
+    # 320 px input is 4x fewer FLOPs than the native 640
+    IMGSZ = 320
 
-    def __init__(self, camera, model, confidence_threshold, parent):
+    def __init__(self, frames, model, confidence_threshold, parent, half=False,
+                 period=0.1):
         super().__init__()
-        self.camera = camera
+        self.frames = frames  # fed by the single CameraThread reader
         self.model = model
         self.confidence_threshold = confidence_threshold
         self.parent = parent
+        self.period = period  # target sampling interval in seconds
         self.running = False
+        # FP16 + explicit device on CUDA; skips ultralytics' per-call probe.
+        # classes=[0] skips NMS/postprocess work on anything but monkeys.
+        self._infer_kwargs = {'verbose': False, 'imgsz': self.IMGSZ,
+                              'classes': [0]}
+        if TORCH_AVAILABLE and torch.cuda.is_available():
+            self._infer_kwargs.update(half=half, device=0)
+            # Fixed input size every frame - let cudnn pick the best conv algo
+            torch.backends.cudnn.benchmark = True
+        self.preprocessor = (GpuPreprocessor(self.IMGSZ)
+                             if TORCH_AVAILABLE and torch.cuda.is_available()
+                             else None)
+        # CPU letterbox targets, reused across frames (114 = YOLO pad grey).
+        # Two slots, alternated, so the preprocess stage can fill one while
+        # the inference stage still reads the other.
+        self._letterbox_bufs = [np.full((self.IMGSZ, self.IMGSZ, 3), 114,
+                                        dtype=np.uint8) for _ in range(2)]
+        self._lb_idx = 0
+        # Motion gate state: skip the model on frames where nothing moved
+        self._prev_small = None
+        self._last_result = (False, 0.0)
+        # Direct predictor calls stay enabled until they fail once
+        self._direct_ok = True
+        # Dummy model-sized "original image" for the direct path: keeps
+        # postprocess' scale_boxes an identity, so boxes stay in model
+        # space like the high-level tensor call (it also assumes centered
+        # letterbox padding, which GpuPreprocessor doesn't use)
+        self._model_space = np.empty((self.IMGSZ, self.IMGSZ, 3), np.uint8)
+
+    def _letterbox(self, frame):
+        """Resize+pad into the reusable buffer; returns (image, scale).
+
+        Pads right/bottom only so boxes map back with a plain divide -
+        same contract as GpuPreprocessor.
+        """
+        h, w = frame.shape[:2]
+        scale = min(self.IMGSZ / h, self.IMGSZ / w)
+        new_h, new_w = round(h * scale), round(w * scale)
+        buf = self._letterbox_bufs[self._lb_idx]
+        self._lb_idx ^= 1
+        buf[:, :] = 114
+        cv2.resize(frame, (new_w, new_h), dst=buf[:new_h, :new_w])
+        return buf, scale
+
+    def _inference_ctx(self):
+        """No-autograd context: skips per-tensor version counters/metadata"""
+        if TORCH_AVAILABLE:
+            return torch.inference_mode()
+        return contextlib.nullcontext()
+
+    def _infer(self, img, frame):
+        """Run the model, preferring the direct predictor path.
+
+        YOLO.__call__ rebuilds config objects and a source iterator on
+        every call; once the predictor exists (created by the first
+        high-level call), invoking its model and postprocess directly
+        skips all of that per-frame setup. Any failure permanently drops
+        back to the high-level call - correctness over the shortcut.
+        """
+        predictor = getattr(self.model, 'predictor', None)
+        if (self._direct_ok and predictor is not None
+                and TORCH_AVAILABLE and isinstance(img, torch.Tensor)):
+            try:
+                preds = predictor.model(img)
+                # Model-space dummy, NOT the raw frame: both paths must
+                # return 320-space boxes for the single /scale downstream
+                return predictor.postprocess(preds, img,
+                                             [self._model_space])
+            except Exception:
+                self._direct_ok = False
+        return self.model(img, **self._infer_kwargs)
+
+    def _put(self, q, item):
+        """Blocking put that still honours stop(); False means shutting down"""
+        while self.running and self.parent.detection_active:
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _preprocess_loop(self):
+        """Stage 1: sample frames, motion-gate, letterbox/upload.
+
+        Deadline-paced against time.monotonic(): a frame that took 80 ms
+        to stage only sleeps out the remainder of the period instead of a
+        full extra period on top.
+        """
+        next_t = time.monotonic()
+        while self.running and self.parent.detection_active:
+            try:
+                frame = self.frames.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if frame is None:
+                continue
+            # Cheap motion gate: an 80x60 grayscale absdiff costs <0.1 ms;
+            # if the scene is static, skip preprocess and inference and let
+            # the postprocess stage re-emit the last result. 80x60 keeps the
+            # sensor's 4:3 aspect so horizontal motion isn't compressed away.
+            small = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY),
+                               (80, 60))
+            gated = (self._prev_small is not None and
+                     self.parent.motion_threshold > 0 and
+                     _motion_score(self._prev_small, small)
+                     < self.parent.motion_threshold)
+            self._prev_small = small
+            if gated:
+                item = (frame, None, 1.0)
+            else:
+                try:
+                    with self._inference_ctx():
+                        if self.preprocessor is not None:
+                            img, scale = self.preprocessor(frame)
+                        else:
+                            img, scale = self._letterbox(frame)
+                except Exception as e:
+                    print(f"Preprocess error: {e}")
+                    continue
+                item = (frame, img, scale)
+            if not self._put(self._pre_q, item):
+                break
+            next_t += self.period
+            dt = next_t - time.monotonic()
+            if dt > 0:
+                time.sleep(dt)
+            else:
+                next_t = time.monotonic()  # fell behind; don't burst to catch up
 
     def run(self):
+        """Stage 2: inference only.
+
+        Preprocess and postprocess run on their own threads joined by
+        one-slot queues, so the GPU never idles while Python draws boxes
+        and the next frame is letterboxed while the current one infers.
+        Throughput approaches the slowest stage instead of the sum of all
+        three.
+        """
         self.running = True
+        self._pre_q = queue.Queue(maxsize=1)
+        self._post_q = queue.Queue(maxsize=1)
+        pre = threading.Thread(target=self._preprocess_loop, daemon=True)
+        post = threading.Thread(target=self._postprocess_loop, daemon=True)
+        pre.start()
+        post.start()
+        while self.running and self.parent.detection_active:
+            try:
+                frame, img, scale = self._pre_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if img is None:  # motion-gated: nothing to infer
+                self._put(self._post_q, (frame, None, scale))
+                continue
+            try:
+                with self._inference_ctx():
+                    results = self._infer(img, frame)
+            except Exception as e:
+                print(f"Detection error: {e}")
+                continue
+            if not self._put(self._post_q, (frame, results, scale)):
+                break
+        self.running = False
+        pre.join(timeout=1.0)
+        post.join(timeout=1.0)
+
+    def _postprocess_loop(self):
+        """Stage 3: filter boxes, draw overlays, emit results."""
         while self.running and self.parent.detection_active:
-            ret, frame = self.camera.read()
-            if ret:
+            try:
+                frame, results, scale = self._post_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if results is None:
+                # Static scene: re-emit the cached result under a fresh frame
+                self.display_frame.emit(frame)
+                self.detection_result.emit(self._last_result[0],
+                                           self._last_result[1], frame)
+                continue
+
+            monkey_detected = False
+            max_confidence = 0
+
+            for result in results:
+                boxes = result.boxes
+                if boxes is None or len(boxes) == 0:
+                    continue
+                # One bulk GPU->CPU sync for the whole frame, then a
+                # compiled filter; no per-box .item() round-trips
+                conf_t, xyxy_t = boxes.conf, boxes.xyxy
+                if TORCH_AVAILABLE and isinstance(conf_t, torch.Tensor) \
+                        and conf_t.is_cuda:
+                    # Threshold on device so only surviving boxes ever
+                    # cross PCIe
+                    m = conf_t > self.confidence_threshold
+                    conf_t, xyxy_t = conf_t[m], xyxy_t[m]
+                conf = conf_t.detach().cpu().numpy()
+                xyxy = ((xyxy_t.detach().cpu().numpy() / scale)
+                        .astype(np.int32))
+                keep, colors = _filter_boxes(conf, self.confidence_threshold)
+                if keep.size:
+                    monkey_detected = True
+                    max_confidence = max(max_confidence,
+                                         float(conf[keep].max()))
+                if keep.size:
+                    # One polylines call per colour bucket (3 max) instead
+                    # of one rectangle call per box
+                    kxy = xyxy[keep]
+                    pts = np.empty((keep.size, 4, 2), np.int32)
+                    pts[:, 0] = kxy[:, [0, 1]]
+                    pts[:, 1] = kxy[:, [2, 1]]
+                    pts[:, 2] = kxy[:, [2, 3]]
+                    pts[:, 3] = kxy[:, [0, 3]]
+                    for ci in np.unique(colors):
+                        cv2.polylines(frame, pts[colors == ci], True,
+                                      _BOX_COLORS[ci], 2)
+                    for i, ci in zip(keep, colors):
+                        cv2.putText(frame, f'Monkey: {conf[i]:.2f}',
+                                    (xyxy[i, 0], xyxy[i, 1] - 10),
+                                    cv2.FONT_HERSHEY_SIMPLEX,
+                                    0.6, _BOX_COLORS[ci], 2)
+
+            # Update display
+            self.display_frame.emit(frame)
+
+            # Emit detection result (also cached for gated frames)
+            self._last_result = (monkey_detected, max_confidence)
+            self.detection_result.emit(monkey_detected, max_confidence, frame)
+
+    def stop(self):
+        self.running = False
+
+# Serial writer thread - batches queued commands into single port writes
+class SerialWorker(QThread):
+    def __init__(self, arduino):
+        super().__init__()
+        self.arduino = arduino
+        self.commands = queue.Queue()
+        self.running = False
+
+    def run(self):
+        self.running = True
+        last = None
+        while self.running:
+            try:
+                msgs = [self.commands.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            # Coalesce everything pending into one write - one USB round-trip
+            while True:
                 try:
-                    results = self.model(frame, verbose=False)
-
-                    monkey_detected = False
-                    max_confidence = 0
-
-                    for result in results:
-                        boxes = result.boxes
-                        if boxes is not None:
-                            for box in boxes:
-                                confidence = box.conf.item()
-                                if confidence > self.confidence_threshold:
-                                    monkey_detected = True
-                                    max_confidence = max(max_confidence, confidence)
-
-                                    # Draw bounding box
-                                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-
-                                    # Color based on confidence
-                                    if confidence > 0.8:
-                                        color = (0, 255, 0)  # Green
-                                    elif confidence > 0.6:
-                                        color = (0, 255, 255)  # Yellow
-                                    else:
-                                        color = (0, 165, 255)  # Orange
-
-                                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                                    cv2.putText(frame, f'Monkey: {confidence:.2f}', 
-                                              (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 
-                                              0.6, color, 2)
-
-                    # Update display
-                    self.parent.update_camera_display(frame)
-
-                    # Emit detection result
-                    self.detection_result.emit(monkey_detected, max_confidence, frame)
+                    msgs.append(self.commands.get_nowait())
+                except queue.Empty:
+                    break
+            # Drop repeats of the command already on the wire: confidence
+            # oscillating near the threshold otherwise chatters the buzzer
+            out = []
+            for m in msgs:
+                if m != last:
+                    out.append(m)
+                    last = m
+            if not out:
+                continue
+            try:
+                self.arduino.write(b''.join(out))
+            except Exception:
+                pass
 
-                except Exception as e:
-                    print(f"Detection error: {e}")
+    def send(self, command):
+        """Queue a command for the Arduino without blocking the caller"""
+        self.commands.put(command)
+
+    def stop(self):
+        self.running = False
 
-            self.msleep(100)  # ~10 FPS
+# Owns cv2.VideoCapture; reads back-to-back into a 1-slot latest-wins queue
+# so decode latency never sits in the display path
+class FrameGrabber(threading.Thread):
+    def __init__(self, camera):
+        super().__init__(daemon=True)
+        self.camera = camera
+        self.latest = queue.Queue(maxsize=1)
+        self.running = True
+        # Pre-allocated capture buffers; cv2 decodes straight into them.
+        # Several slots so one is never overwritten while a consumer still
+        # holds it.
+        self._ring = None
+        self._idx = 0
+
+    def run(self):
+        while self.running:
+            if self._ring is None:
+                ret, frame = self.camera.read()
+                if ret:
+                    self._ring = [np.empty_like(frame) for _ in range(6)]
+            else:
+                ret, frame = self.camera.read(self._ring[self._idx])
+                self._idx = (self._idx + 1) % len(self._ring)
+            if not ret:
+                continue
+            try:
+                self.latest.put_nowait(frame)
+            except queue.Full:
+                try:  # latest-wins: replace the stale frame
+                    self.latest.get_nowait()
+                    self.latest.put_nowait(frame)
+                except queue.Empty:
+                    pass
 
     def stop(self):
         self.running = False
 
-# Simple camera thread
+# Single camera reader - fans frames out to both display and detection
 class CameraThread(QThread):
-    frame_ready = pyqtSignal(np.ndarray)
+    # object signature: PyQt hands the ndarray through by reference instead
+    # of marshalling it through QVariant
+    frame_ready = pyqtSignal(object)
+    fps_changed = pyqtSignal(float)
 
     def __init__(self, camera):
         super().__init__()
         self.camera = camera
         self.running = False
+        # One-slot latest-wins hand-off to the detection thread: the model
+        # always runs on the newest frame, and a slow model can never back
+        # the capture up or be handed a stale backlog
+        self.frames = queue.Queue(maxsize=1)
+        # Detection gets copies, recycled through a pool: the grabber's ring
+        # wraps every ~200 ms at 30 FPS, while the 3-stage pipeline can hold
+        # a frame longer than that - handing the ring buffer over by
+        # reference means overlays get drawn into a slot the camera is
+        # already decoding the next frame into
+        self._det_pool = BufferPool()
+        # Capture rate over a rolling 30-frame window of monotonic integer
+        # nanosecond timestamps (immune to NTP wall-clock jumps); emitted
+        # only on meaningful change so the GUI isn't woken for every frame
+        self.fps = 0.0
+        self._ts = deque(maxlen=30)
+        self._last_emitted_fps = 0.0
 
     def run(self):
         self.running = True
+        grabber = FrameGrabber(self.camera)
+        grabber.start()
+        # No msleep floor: pacing comes from the camera itself via the
+        # blocking get on the grabber's latest-frame slot
         while self.running:
-            ret, frame = self.camera.read()
-            if ret:
-                self.frame_ready.emit(frame)
-            self.msleep(33)  # ~30 FPS
+            try:
+                frame = grabber.latest.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._ts.append(time.perf_counter_ns())
+            if len(self._ts) >= 2:
+                self.fps = ((len(self._ts) - 1) * 1e9
+                            / (self._ts[-1] - self._ts[0]))
+                if abs(self.fps - self._last_emitted_fps) > 0.5:
+                    self.fps_changed.emit(self.fps)
+                    self._last_emitted_fps = self.fps
+            self.frame_ready.emit(frame)
+            det = self._det_pool.get(frame.shape, frame.dtype)
+            np.copyto(det, frame)
+            try:
+                self.frames.put_nowait(det)
+            except queue.Full:
+                try:  # drop the oldest so detection sees the latest frame
+                    self._det_pool.put(self.frames.get_nowait())
+                    self.frames.put_nowait(det)
+                except queue.Empty:
+                    pass
+        grabber.stop()
 
     def stop(self):
         self.running = False
@@ -648,6 +1376,7 @@ class CameraThread(QThread):
 def main():
     app = QApplication(sys.argv)
     app.setApplicationName("AI Monkey Detection System")
+    app.setStyleSheet(_STYLE)  # applied once for all windows
 
     window = FixedMonkeyDetectorGUI()
     window.show()
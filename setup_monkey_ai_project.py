@@ -0,0 +1,50 @@
+
+"""
+Project Setup Script for Monkey Detection AI
+Creates the folder layout and dataset config the training script expects
+"""
+
+import os
+from pathlib import Path
+
+# Fixed layout, baked in at import so repeated CI runs do no string rebuilding
+FOLDERS = (
+    'monkey_dataset/images/train',
+    'monkey_dataset/images/val',
+    'monkey_dataset/labels/train',
+    'monkey_dataset/labels/val',
+    'runs',
+    'detections',
+    'test_images',
+)
+
+DATA_YAML = """path: monkey_dataset
+train: images/train
+val: images/val
+
+nc: 1
+names: ['monkey']
+"""
+
+def setup_project_structure():
+    """Create the project folders (no-op for ones that already exist)"""
+    created = 0
+    for folder in FOLDERS:
+        if not os.path.exists(folder):
+            Path(folder).mkdir(parents=True, exist_ok=True)
+            print(f"📁 Created: {folder}")
+            created += 1
+    if not created:
+        print("✅ Project structure already in place")
+
+def create_dataset_config():
+    """Write the YOLO dataset config"""
+    Path('monkey_dataset/data.yaml').write_text(DATA_YAML)
+    print("📝 Dataset config written: monkey_dataset/data.yaml")
+
+if __name__ == "__main__":
+    print("🐒 Setting up Monkey Detection AI project")
+    print("="*50)
+    setup_project_structure()
+    create_dataset_config()
+    print("🎉 Setup complete!")
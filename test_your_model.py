@@ -6,7 +6,143 @@ Run this after training completes
 
 from ultralytics import YOLO
 import cv2
+import numpy as np
 import os
+import queue
+import sys
+import threading
+
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+# Per-box confidence printing costs stdout formatting in the hot loop;
+# opt in with --debug
+DEBUG = '--debug' in sys.argv
+
+# --batch groups up to 4 frames per model() call, amortizing the fixed
+# Python+launch overhead. Default stays 1: for a live preview, waiting to
+# fill a batch just adds latency, so this is for throughput testing.
+BATCH = 4 if '--batch' in sys.argv else 1
+
+# --no-display turns the loop into pure inference (imshow+waitKey alone
+# cost a few ms/frame); quit with Ctrl+C
+DISPLAY = '--no-display' not in sys.argv
+
+# --int8 builds (once) and prefers an INT8-calibrated engine; roughly
+# doubles throughput again over FP16 on INT8-capable GPUs
+INT8 = '--int8' in sys.argv
+
+# --cuda-graph captures the fixed-shape forward pass in a CUDA graph and
+# replays it per frame, skipping per-call kernel launch overhead on the
+# .pt path (TensorRT engines already do their own capture)
+CUDA_GRAPH = '--cuda-graph' in sys.argv
+
+# Full detection runs every Nth frame; cheap KCF tracking carries the
+# boxes across the frames in between
+DETECT_EVERY = 3
+
+def make_tracker():
+    """A KCF tracker, from wherever this OpenCV build exposes it"""
+    if hasattr(cv2, 'TrackerKCF_create'):
+        return cv2.TrackerKCF_create()
+    if hasattr(cv2, 'legacy') and hasattr(cv2.legacy, 'TrackerKCF_create'):
+        return cv2.legacy.TrackerKCF_create()
+    return None
+
+class GpuFeeder:
+    """Stages each frame in pinned host memory and uploads it asynchronously.
+
+    A pageable numpy array forces the driver through a hidden staging copy
+    per call; a pinned FP16 buffer plus a private CUDA stream lets the H2D
+    transfer run as true async DMA that overlaps the previous frame's work.
+    """
+
+    def __init__(self, imgsz=640, channels_last=False):
+        self.imgsz = imgsz
+        self.channels_last = channels_last  # only for the eager .pt backend
+        self.host = None  # pinned, lazily sized to the raw frame shape
+        self.stream = torch.cuda.Stream()
+
+    def __call__(self, frame):
+        """(tensor, scale): a letterboxed NCHW FP16 tensor on the GPU plus
+        the letterbox scale that maps model-space boxes back to the frame.
+
+        Only the raw uint8 frame crosses PCIe; resize, BGR->RGB, transpose
+        and normalize all run as GPU ops, keeping the bandwidth-bound work
+        off the CPU and out of the GIL's way. The pad goes on the
+        right/bottom only, so the reverse mapping is a plain divide by
+        scale - no offset to undo.
+        """
+        h, w = frame.shape[:2]
+        scale = min(self.imgsz / h, self.imgsz / w)
+        new_h, new_w = round(h * scale), round(w * scale)
+        if self.host is None or tuple(self.host.shape) != frame.shape:
+            self.host = torch.empty(frame.shape, dtype=torch.uint8,
+                                    pin_memory=True)
+        self.host.numpy()[:] = frame
+        with torch.cuda.stream(self.stream):
+            t = self.host.cuda(non_blocking=True)                 # HWC uint8 BGR
+            t = t.permute(2, 0, 1).flip(0).unsqueeze(0).half() / 255.0
+            t = torch.nn.functional.interpolate(
+                t, size=(new_h, new_w), mode='bilinear', align_corners=False)
+            t = torch.nn.functional.pad(
+                t, (0, self.imgsz - new_w, 0, self.imgsz - new_h),
+                value=114 / 255)
+            if self.channels_last:
+                # Match the eager backbone's channels-last layout so the
+                # first conv doesn't transpose
+                t = t.contiguous(memory_format=torch.channels_last)
+            else:
+                # Engine/ONNX backends bind the tensor's raw data pointer
+                # and assume NCHW-contiguous bytes; channels-last passes the
+                # shape check but feeds the engine scrambled pixels
+                t = t.contiguous()
+        torch.cuda.current_stream().wait_stream(self.stream)
+        return t, scale
+
+class FrameGrabber:
+    """Reads the webcam on its own thread and keeps only the newest frame.
+
+    cap.read() blocks ~33ms at 30 FPS; decoupling it means the GPU never
+    waits on the camera and detection always runs on the live frame.
+    """
+
+    def __init__(self, cap):
+        self.cap = cap
+        self.latest = queue.Queue(maxsize=1)
+        self.running = True
+        self.failed = False
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def _loop(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                self.failed = True
+                frame = None  # propagate the failure to the consumer
+            try:
+                self.latest.put_nowait(frame)
+            except queue.Full:
+                try:  # latest-wins: replace the stale frame
+                    self.latest.get_nowait()
+                    self.latest.put_nowait(frame)
+                except queue.Empty:
+                    pass
+            if frame is None:
+                break
+
+    def read(self, timeout=1.0):
+        """Newest frame, or None on camera failure/timeout"""
+        try:
+            return self.latest.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        self.running = False
 
 def test_trained_model():
     print("🧪 Testing Your Trained Monkey Detection Model")
@@ -21,53 +157,322 @@ def test_trained_model():
         print("Make sure training completed successfully")
         return
 
-    # Load your trained model
+    # Load your trained model - prefer a TensorRT engine (2-5x faster than
+    # .pt per frame; built once and cached next to the weights)
     print("📥 Loading your custom trained model...")
-    model = YOLO(model_path)
-    print("✅ Model loaded successfully!")
+    # Engines freeze their batch dimension, so cache one per batch size - a
+    # batch-1 engine left behind by a plain run would trip the AutoBackend
+    # shape assert the moment --batch reuses it
+    suffix = f'_b{BATCH}' if BATCH > 1 else ''
+    int8_path = model_path.replace('best.pt', f'best_int8{suffix}.engine')
+    if INT8 and not os.path.exists(int8_path):
+        try:
+            # Entropy calibration runs over the dataset named by data=
+            print("⚡ Building INT8 engine (calibration takes a while)...")
+            built = YOLO(model_path).export(
+                format="engine", int8=True, data="monkey_dataset/data.yaml",
+                imgsz=640, batch=BATCH, workspace=4)
+            os.replace(built, int8_path)
+        except Exception as e:
+            print(f"⚠️ INT8 export failed ({e}), trying FP16")
+    engine_path = model_path.replace('best.pt', f'best{suffix}.engine')
+    onnx_path = model_path.replace('best.pt', f'best{suffix}.onnx')
+    if not os.path.exists(int8_path) and not os.path.exists(engine_path):
+        try:
+            print("⚡ Building TensorRT engine (one-time, a few minutes)...")
+            built = YOLO(model_path).export(format="engine", half=True,
+                                            simplify=True, imgsz=640,
+                                            dynamic=False, batch=BATCH)
+            os.replace(built, engine_path)
+        except Exception as e:
+            print(f"⚠️ Engine export failed ({e}), trying ONNX")
+            # No TensorRT on this host: ONNX Runtime with the CUDA provider
+            # still beats raw PyTorch and is portable
+            if not os.path.exists(onnx_path):
+                try:
+                    built = YOLO(model_path).export(format="onnx", half=True,
+                                                    simplify=True,
+                                                    dynamic=False,
+                                                    batch=BATCH, opset=17)
+                    os.replace(built, onnx_path)
+                except Exception as e2:
+                    print(f"⚠️ ONNX export failed ({e2}), using PyTorch weights")
+    feeder_channels_last = False  # set when the eager model is converted
+    if os.path.exists(int8_path):
+        model = YOLO(int8_path, task='detect')
+        print("✅ TensorRT INT8 engine loaded!")
+    elif os.path.exists(engine_path):
+        model = YOLO(engine_path, task='detect')
+        print("✅ TensorRT engine loaded!")
+    elif os.path.exists(onnx_path):
+        model = YOLO(onnx_path, task='detect')
+        print("✅ ONNX model loaded!")
+    else:
+        model = YOLO(model_path)
+        print("✅ Model loaded successfully!")
+        # No engine available: torch.compile recovers some of the gap by
+        # fusing kernels; warm up so compile cost isn't paid on frame 1.
+        # Skipped under --cuda-graph, which captures the eager graph itself.
+        if (TORCH_AVAILABLE and torch.cuda.is_available()
+                and hasattr(torch, 'compile') and not CUDA_GRAPH):
+            try:
+                # NHWC layout: cuDNN picks tensor-core kernels without an
+                # internal transpose on Ampere+
+                model.model = model.model.to(
+                    memory_format=torch.channels_last)
+                feeder_channels_last = True
+                model.model = torch.compile(model.model,
+                                            mode='reduce-overhead',
+                                            fullgraph=False)
+                for _ in range(3):
+                    model(np.zeros((640, 640, 3), dtype=np.uint8),
+                          verbose=False)
+                print("⚡ Model compiled (reduce-overhead)")
+            except Exception:
+                pass  # older torch: eager still works
 
     # Test on webcam
     print("🎥 Starting webcam test...")
     print("Press 'q' to quit, 's' to save detection")
 
-    cap = cv2.VideoCapture(0)
+    # Explicit V4L2 backend off Windows; 1-frame buffer so detection always
+    # sees the live frame instead of one ~4 frames stale
+    if sys.platform == 'win32':
+        cap = cv2.VideoCapture(0)
+    else:
+        cap = cv2.VideoCapture(0, cv2.CAP_V4L2)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    # 640x480 matches the model input (no wasted decode of 720p+), and MJPG
+    # transport cuts USB bandwidth ~10x vs raw YUYV
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    cap.set(cv2.CAP_PROP_FPS, 30)
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    grabber = FrameGrabber(cap)
+    feeder = (GpuFeeder(channels_last=feeder_channels_last)
+              if TORCH_AVAILABLE and torch.cuda.is_available() else None)
     detection_count = 0
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("❌ Failed to access webcam")
-            break
-
-        # Run your AI detection
-        results = model(frame, conf=0.5)  # 50% confidence threshold
-
-        # Draw results
-        annotated_frame = results[0].plot()
-
-        # Count detections
-        boxes = results[0].boxes
-        if boxes is not None and len(boxes) > 0:
-            detection_count += 1
-            print(f"🐒 Monkey detected! (Detection #{detection_count})")
-
-            # Show detection details
-            for box in boxes:
-                conf = box.conf.item()
-                print(f"   Confidence: {conf:.3f}")
-
-        # Display
-        cv2.imshow('Your Trained Monkey Detector - Press q to quit', annotated_frame)
-
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
-            break
-        elif key == ord('s'):
-            # Save current frame
-            filename = f'detection_result_{detection_count}.jpg'
-            cv2.imwrite(filename, annotated_frame)
+    # Display and JPEG encode run on their own threads so imshow/waitKey
+    # jitter and 's'-key disk writes never stall the detection loop
+    disp_q = queue.Queue(maxsize=2)
+    save_q = queue.Queue()
+    key_q = queue.Queue()
+
+    def display_loop():
+        while True:
+            img = disp_q.get()
+            if img is None:
+                break
+            cv2.imshow('Your Trained Monkey Detector - Press q to quit', img)
+            key = cv2.waitKey(1) & 0xFF
+            if key != 255:
+                key_q.put(key)
+
+    def save_loop():
+        while True:
+            item = save_q.get()
+            if item is None:
+                break
+            filename, img = item
+            cv2.imwrite(filename, img, [cv2.IMWRITE_JPEG_QUALITY, 85])
             print(f"💾 Saved: {filename}")
 
+    def poll_key():
+        try:
+            return key_q.get_nowait()
+        except queue.Empty:
+            return 255
+
+    if DISPLAY:
+        threading.Thread(target=display_loop, daemon=True).start()
+    threading.Thread(target=save_loop, daemon=True).start()
+
+    # Warm-up: the first few engine/CUDA calls pay allocator and autotune
+    # costs, so spend them on dummy frames before the window appears
+    print("🔥 Warming up the model...")
+    dummy = np.zeros((480, 640, 3), dtype=np.uint8)
+    for _ in range(5):
+        # Full-batch dummies: a static-batch engine asserts on anything else
+        model([dummy] * BATCH, conf=0.5, half=True, imgsz=640, verbose=False)
+
+    # Capture the forward pass in a CUDA graph now that warmup has created
+    # the predictor; replay swaps hundreds of kernel launches for one call
+    graph = None
+    # Model-sized dummy "original image" for the graph path's postprocess:
+    # scale_boxes assumes centered letterbox padding, but GpuFeeder pads
+    # right/bottom only, so rescaling against the raw frame shifts every box
+    # up and left by half the pad. With the dummy the rescale is an identity
+    # and the graph path returns model-space boxes like the plain feeder call.
+    model_space = np.empty((640, 640, 3), np.uint8)
+    if (CUDA_GRAPH and feeder is not None and BATCH == 1
+            and getattr(model, 'predictor', None) is not None):
+        try:
+            net = model.predictor.model
+            static_in = torch.zeros((1, 3, 640, 640), device='cuda',
+                                    dtype=torch.half).contiguous(
+                                        memory_format=torch.channels_last)
+            torch.cuda.synchronize()
+            g = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(g):
+                static_out = net(static_in)
+            graph = (g, static_in, static_out)
+            print("⚡ CUDA graph captured")
+        except Exception as e:
+            print(f"⚠️ CUDA graph capture failed ({e}), running eager")
+
+    quit_requested = False
+    trackers = []
+    frame_idx = 0
+    while not quit_requested:
+        frame = grabber.read(timeout=0.1)
+        if frame is None:
+            if grabber.failed:
+                print("❌ Failed to access webcam")
+                break
+            # Idle gap: a dummy pass keeps the engine's clocks/caches hot
+            model([dummy] * BATCH, conf=0.5, half=True, imgsz=640,
+                  verbose=False)
+            continue
+        frame_idx += 1
+
+        # Keyframe interleaving (single-frame mode): the model runs every
+        # DETECT_EVERY-th frame, KCF carries the boxes in between - webcam
+        # scenes barely change in 1/10 s, so this is nearly free framerate
+        if BATCH == 1 and trackers and frame_idx % DETECT_EVERY != 0:
+            tracked = []
+            for trk in trackers:
+                ok, bb = trk.update(frame)
+                if not ok:
+                    tracked = None  # lost it: fall through to full detection
+                    break
+                tracked.append(bb)
+            if tracked is not None:
+                if DISPLAY:
+                    for x, y, bw, bh in tracked:
+                        cv2.rectangle(frame, (int(x), int(y)),
+                                      (int(x + bw), int(y + bh)),
+                                      (0, 255, 0), 2)
+                    try:
+                        disp_q.put_nowait(frame)
+                    except queue.Full:
+                        pass
+                if poll_key() == ord('q'):
+                    quit_requested = True
+                continue
+            trackers = []
+
+        frames = [frame]
+        while len(frames) < BATCH:
+            extra = grabber.read(timeout=0.05)
+            if extra is None:
+                break
+            frames.append(extra)
+
+        # Run your AI detection (FP16 halves bandwidth on the GPU;
+        # verbose=False skips ultralytics' ~1ms of per-call logging)
+        # scale is None on the numpy path (ultralytics letterboxes there and
+        # returns frame-space boxes); on the feeder/graph path boxes come
+        # back in model space and need the single divide below
+        if feeder is not None and BATCH == 1:
+            inp, scale = feeder(frames[0])
+        else:
+            # A static-batch engine asserts on the exact batch size, and the
+            # fill loop gives up after its timeout - pad a short grab with
+            # repeats of the last frame; the zip below drops their results
+            inp = frames + [frames[-1]] * (BATCH - len(frames))
+            scale = None
+        results = None
+        if graph is not None and len(frames) == 1:
+            try:
+                g, static_in, static_out = graph
+                static_in.copy_(inp)
+                g.replay()
+                results = model.predictor.postprocess(
+                    static_out, static_in, [model_space])
+            except Exception:
+                graph = None  # replay broke: back to the standard call
+        if results is None:
+            # iou/max_det/classes bound the NMS sort to the single monkey
+            # class and a handful of candidates instead of 300 across all
+            results = model(inp, conf=0.5, iou=0.6, max_det=10, classes=[0],
+                            half=True, imgsz=640, verbose=False)
+
+        for frame, result in zip(frames, results):
+            # Count detections
+            boxes = result.boxes
+            if boxes is not None and len(boxes) > 0:
+                detection_count += 1
+                # One batched GPU->CPU transfer; per-box .item() calls each
+                # stall the CUDA stream
+                confs = boxes.conf.cpu().numpy()
+                xyxy = boxes.xyxy.cpu().numpy()
+                if scale is not None:
+                    xyxy /= scale  # model space -> frame space
+                xyxy = xyxy.astype(int)
+                print(f"🐒 Monkey detected! (Detection #{detection_count}, "
+                      f"best {confs.max():.3f})")
+
+                # Show detection details (only when asked - stdout is slow;
+                # one format call for the whole array, not one per box)
+                if DEBUG:
+                    print("   Confidences:",
+                          np.array2string(confs, precision=3))
+
+                # Seed trackers so the next couple of frames can skip the
+                # model entirely
+                if BATCH == 1:
+                    trackers = []
+                    for x1, y1, x2, y2 in xyxy:
+                        trk = make_tracker()
+                        if trk is None:
+                            break  # no tracker module in this OpenCV build
+                        trk.init(frame, (x1, y1, x2 - x1, y2 - y1))
+                        trackers.append(trk)
+            elif BATCH == 1:
+                trackers = []
+
+            if not DISPLAY:
+                continue
+
+            # Draw results - plot() allocates a full-frame copy, so only pay
+            # for it when there's actually something to draw. On the feeder
+            # path plot() would render onto the RGB model-space tensor
+            # (blue monkeys, wrong coordinates) - draw the mapped boxes on
+            # the original BGR frame instead.
+            if boxes is not None and len(boxes) > 0:
+                if scale is not None:
+                    annotated_frame = frame
+                    for (x1, y1, x2, y2), conf in zip(xyxy, confs):
+                        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2),
+                                      (0, 255, 0), 2)
+                        cv2.putText(annotated_frame, f'monkey {conf:.2f}',
+                                    (x1, max(y1 - 6, 12)),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                                    (0, 255, 0), 1)
+                else:
+                    annotated_frame = result.plot()
+            else:
+                annotated_frame = frame
+
+            # Display (drop the frame if the display thread is behind)
+            try:
+                disp_q.put_nowait(annotated_frame)
+            except queue.Full:
+                pass
+
+            key = poll_key()
+            if key == ord('q'):
+                quit_requested = True
+                break
+            elif key == ord('s'):
+                # Save current frame (copy: the buffer is reused)
+                filename = f'detection_result_{detection_count}.jpg'
+                save_q.put((filename, annotated_frame.copy()))
+
+    grabber.stop()
+    disp_q.put(None)
+    save_q.put(None)
     cap.release()
     cv2.destroyAllWindows()
 